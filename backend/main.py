@@ -10,14 +10,28 @@ from fastapi.responses import JSONResponse
 import cv2
 import numpy as np
 import mediapipe as mp
+import msgspec
+from cachetools import TTLCache
 import base64
-import json
 import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import asyncio
 
 from squat_detector import SquatDetector
+from tflite_pose import TFLitePose
+
+# Optional libjpeg-turbo decoder (PyTurboJPEG); cv2.imdecode is the fallback
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_RGB
+    turbo_jpeg: Optional[TurboJPEG] = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    turbo_jpeg = None
 
 # Configure logging
 logging.basicConfig(
@@ -46,37 +60,465 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize MediaPipe Pose
+# MediaPipe Pose settings
+# Lite model by default; override with POSE_MODEL_COMPLEXITY=1 (Full) or 2 (Heavy)
+POSE_MODEL_COMPLEXITY = int(os.getenv("POSE_MODEL_COMPLEXITY", "0"))
+
+# Optional direct TFLite landmark model (e.g. pose_landmark_lite int8); MediaPipe is the fallback
+POSE_TFLITE_MODEL = os.getenv("POSE_TFLITE_MODEL")
+# Interpreter threads per session (sessions already run in parallel on the inference pool)
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", "1"))
+
 mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(
-    static_image_mode=False,
-    model_complexity=1,  # 0=Lite, 1=Full, 2=Heavy
-    smooth_landmarks=True,
-    enable_segmentation=False,
-    smooth_segmentation=False,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+
+
+def create_pose(static_image_mode: bool = False):
+    """Create a pose estimator - TFLite model if configured, otherwise MediaPipe Pose"""
+    if POSE_TFLITE_MODEL:
+        try:
+            return TFLitePose(POSE_TFLITE_MODEL, num_threads=TFLITE_NUM_THREADS)
+        except Exception as e:
+            logger.warning(f"⚠️ TFLite pose model unavailable, using MediaPipe: {e}")
+    
+    return mp_pose.Pose(
+        static_image_mode=static_image_mode,
+        model_complexity=POSE_MODEL_COMPLEXITY,  # 0=Lite, 1=Full, 2=Heavy
+        smooth_landmarks=False,  # Smoothing is cheaper on the client
+        enable_segmentation=False,
+        smooth_segmentation=False,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+# Stateless pose estimator for single-image requests, shared across pool workers
+image_pose = create_pose(static_image_mode=True)
+image_pose_lock = threading.Lock()
+
+# Thread pool for blocking decode + inference (native code releases the GIL)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+inference_pool = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+
+def detect_landmarks(pose, frame: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Run pose inference on a frame decoded by decode_frame(pose, ...),
+    returning a (33, 4) landmark array or None if no pose
+    """
+    # TFLitePose takes BGR and swaps channels itself after resizing;
+    # MediaPipe gets contiguous RGB
+    results = pose.process(frame)
+    if isinstance(pose, TFLitePose):
+        return results
+    
+    if not results.pose_landmarks:
+        return None
+    
+    # Fill one flat buffer straight from the protobuf landmarks
+    return np.fromiter(
+        (v for lm in results.pose_landmarks.landmark for v in (lm.x, lm.y, lm.z, lm.visibility)),
+        dtype=np.float32,
+        count=len(results.pose_landmarks.landmark) * 4
+    ).reshape(-1, 4)
+
+
+# Frames larger than this (longest side, px) are downscaled during JPEG decode;
+# the pose models run at 256x256 so full-resolution decoding is wasted work
+MAX_FRAME_SIDE = int(os.getenv("MAX_FRAME_SIDE", "640"))
+
+# libjpeg DCT-domain scaling: decode at 1/2, 1/4 or 1/8 size without full IDCT
+DECODE_SCALES = (1, 2, 4, 8)
+CV2_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Start-of-frame markers (baseline/progressive/etc.), excluding DHT, JPG and DAC
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(jpeg: np.ndarray) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG header without decoding, or None if not a JPEG"""
+    data = jpeg.data
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1  # Fill byte
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    
+    return None
+
+
+def decode_scale(width: int, height: int) -> int:
+    """Pick the smallest decode reduction that brings the frame within MAX_FRAME_SIDE"""
+    longest_side = max(width, height)
+    for scale in DECODE_SCALES:
+        if longest_side <= MAX_FRAME_SIDE * scale:
+            return scale
+    return DECODE_SCALES[-1]
+
+
+def decode_frame(pose, jpeg: np.ndarray, use_turbo: bool = True) -> Optional[np.ndarray]:
+    """
+    Decode (and downscale) a frame in the channel order the pose estimator takes:
+    BGR for TFLitePose, RGB for MediaPipe. Returns None if the image can't be read.
+    
+    The libjpeg-turbo path ignores EXIF orientation, so pass use_turbo=False for
+    uploaded photos; OpenCV applies the orientation tag.
+    """
+    rgb = not isinstance(pose, TFLitePose)
+    
+    if use_turbo and turbo_jpeg is not None:
+        try:
+            # Decodes straight to the target channel order - no cvtColor pass
+            width, height, _, _ = turbo_jpeg.decode_header(jpeg)
+            return turbo_jpeg.decode(
+                jpeg,
+                pixel_format=TJPF_RGB if rgb else TJPF_BGR,
+                scaling_factor=(1, decode_scale(width, height))
+            )
+        except OSError:
+            pass  # Not a JPEG - let OpenCV try
+    
+    size = jpeg_size(jpeg)
+    flag = CV2_DECODE_FLAGS[decode_scale(*size)] if size else cv2.IMREAD_COLOR
+    frame = cv2.imdecode(jpeg, flag)
+    if frame is not None and rgb:
+        # MediaPipe needs contiguous RGB; convert in place to avoid a new frame buffer
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+    return frame
+
+
+def process_frame(pose, jpeg: np.ndarray, use_turbo: bool = True) -> Tuple[bool, Optional[np.ndarray]]:
+    """
+    Decode a JPEG buffer and run pose inference - blocking, runs in inference_pool
+    
+    Returns:
+        (decoded, landmarks) - decoded is False if the image could not be read
+    """
+    frame = decode_frame(pose, jpeg, use_turbo)
+    if frame is None:
+        return False, None
+    
+    return True, detect_landmarks(pose, frame)
+
+
+def process_image_frame(jpeg: np.ndarray) -> Tuple[bool, Optional[np.ndarray]]:
+    """process_frame on the shared single-image estimator"""
+    with image_pose_lock:
+        # Photos may carry EXIF rotation; camera frames from the WebSocket don't
+        return process_frame(image_pose, jpeg, use_turbo=False)
+
+
+# Outbound WebSocket message schemas (fixed shape, encoded with msgspec)
+class SquatAnalysisPayload(msgspec.Struct):
+    is_squat_position: bool
+    knee_angle: float
+    hip_angle: float
+    back_angle: float
+    hip_depth: float
+    form_feedback: str
+    checkpoint_results: Dict[int, bool]
+
+
+class PoseResponse(msgspec.Struct, tag_field="type", tag="pose_results"):
+    landmarks: List[List[float]]  # [x, y, z, visibility] per landmark
+    squat_analysis: SquatAnalysisPayload
+    squat_count: int
+    voice_feedback: Optional[str]
+    t_ms: int  # Monotonic server clock, milliseconds
+
+
+def enable_tcp_nodelay(websocket: WebSocket):
+    """
+    Disable Nagle's algorithm on the connection's TCP socket
+    
+    asyncio and uvloop already do this for TCP transports; set it explicitly so
+    per-frame responses never wait on a delayed ACK regardless of server setup.
+    Best-effort: the transport is reached through the ASGI server's protocol.
+    """
+    try:
+        protocol = getattr(websocket._receive, "__self__", None)
+        transport = getattr(protocol, "transport", None)
+        sock = transport.get_extra_info("socket") if transport else None
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError as e:
+        logger.debug(f"Could not set TCP_NODELAY: {e}")
+
+
+# Opcodes - first byte of every binary WebSocket message from the client
+OP_FRAME = 0x01  # Followed by raw JPEG bytes
+OP_RESET = 0x02
+OP_PING = 0x03
+
+# Close code sent when the socket's session was ended, expired or evicted
+WS_CLOSE_SESSION_ENDED = 4000
 
 # Session management
 class WorkoutSession:
     def __init__(self):
         self.detector = SquatDetector()
+        self.pose = None  # Per-session tracker state, built on first frame by infer()
+        self._pose_lock = threading.Lock()  # Held by pool threads while the graph is in use
         self.start_time = datetime.now()
         self.end_time: Optional[datetime] = None
         self.frame_count = 0
         self.is_active = True
+        self.connections = 0  # Open WebSockets
+        self.idle_timer: Optional[asyncio.TimerHandle] = None  # Pending drop_idle_session
         
     def get_duration_seconds(self) -> int:
         end = self.end_time if self.end_time else datetime.now()
         return int((end - self.start_time).total_seconds())
     
+    def infer(self, jpeg: np.ndarray) -> Tuple[bool, Optional[np.ndarray]]:
+        """process_frame on this session's pose graph - blocking, runs in inference_pool"""
+        with self._pose_lock:
+            if not self.is_active:
+                return False, None
+            if self.pose is None:
+                # Building the graph loads the model - keep it off the event loop
+                self.pose = create_pose()
+            return process_frame(self.pose, jpeg)
+    
     def end_session(self):
+        was_active = self.is_active
         self.end_time = datetime.now()
         self.is_active = False
+        if was_active:
+            # Free native graph memory once any in-flight inference has finished;
+            # closing here could race a pool thread still inside pose.process()
+            inference_pool.submit(self._close_pose)
+    
+    def _close_pose(self):
+        with self._pose_lock:
+            if self.pose is not None:
+                self.pose.close()
+                self.pose = None
+
+
+class SessionCache(TTLCache):
+    """TTLCache that ends sessions (releasing their pose graphs) when they expire or are evicted"""
+    
+    def popitem(self):
+        session_id, session = super().popitem()
+        self._release(session_id, session)
+        return session_id, session
+    
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for session_id, session in expired:
+            self._release(session_id, session)
+        return expired
+    
+    @staticmethod
+    def _release(session_id: str, session: WorkoutSession):
+        if session.is_active:
+            session.end_session()
+        logger.info(f"🧹 Evicted session: {session_id}")
+
+
+# Sessions expire SESSION_TTL_SECONDS after their last activity
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+
+# Idle time after a WebSocket disconnect before the session is dropped
+SESSION_GRACE_SECONDS = int(os.getenv("SESSION_GRACE_SECONDS", "600"))
 
 # Store active sessions
-sessions: Dict[str, WorkoutSession] = {}
+sessions: Dict[str, WorkoutSession] = SessionCache(maxsize=MAX_SESSIONS, ttl=SESSION_TTL_SECONDS)
+
+
+def drop_idle_session(session_id: str, session: WorkoutSession):
+    """Remove a session whose grace timer ran out (cancelled whenever a WebSocket connects)"""
+    session.idle_timer = None
+    if session.connections == 0 and sessions.get(session_id) is session:
+        del sessions[session_id]
+        if session.is_active:
+            session.end_session()
+        logger.info(f"🧹 Dropped idle session: {session_id}")
+
+
+# WebSocket pipeline
+
+class Outbox:
+    """
+    Per-connection send buffer - control replies are always delivered in order,
+    but only the newest frame result is kept, so a slow reader never builds up
+    a backlog of stale results
+    """
+    
+    def __init__(self):
+        self._replies: List = []  # Control replies (1:1 with client messages) and must-deliver results
+        self._latest_result = None
+        self._ready = asyncio.Event()
+    
+    def put_reply(self, message):
+        # A pending result predates this reply (e.g. reset_complete) - keep it first
+        if self._latest_result is not None:
+            self._replies.append(self._latest_result)
+            self._latest_result = None
+        self._replies.append(message)
+        self._ready.set()
+    
+    def put_result(self, message, must_deliver: bool = False):
+        """
+        Queue a frame result, replacing any result not yet sent; must_deliver
+        results (e.g. carrying voice feedback) are never replaced
+        """
+        if must_deliver:
+            self._latest_result = None
+            self._replies.append(message)
+        else:
+            self._latest_result = message
+        self._ready.set()
+    
+    async def drain(self) -> List:
+        """Wait for messages and take everything pending"""
+        await self._ready.wait()
+        self._ready.clear()
+        
+        batch, self._replies = self._replies, []
+        if self._latest_result is not None:
+            batch.append(self._latest_result)
+            self._latest_result = None
+        return batch
+
+
+class FrameSlot:
+    """Per-connection latest-frame slot - stale frames are dropped, not queued"""
+    
+    def __init__(self):
+        self._frame: Optional[np.ndarray] = None
+        self._ready = asyncio.Event()
+    
+    def submit(self, frame: np.ndarray):
+        """Store a new frame, discarding any frame still waiting to be processed"""
+        self._frame = frame
+        self._ready.set()
+    
+    async def take(self) -> Optional[np.ndarray]:
+        """Wait for and take the latest frame (no lock needed on the event loop)"""
+        await self._ready.wait()
+        self._ready.clear()
+        frame, self._frame = self._frame, None
+        return frame
+    
+    def clear(self):
+        """Drop any pending frame"""
+        self._frame = None
+        self._ready.clear()
+
+
+async def process_frames(websocket: WebSocket, session: WorkoutSession,
+                         frames: FrameSlot, outbox: Outbox):
+    """Processor task - runs pose inference and squat analysis on the latest frame"""
+    loop = asyncio.get_running_loop()
+    
+    try:
+        while True:
+            nparr = await frames.take()
+            if nparr is None:
+                continue
+            
+            # Decode and run pose inference off the event loop
+            decoded, landmarks = await loop.run_in_executor(
+                inference_pool, session.infer, nparr
+            )
+            
+            if not session.is_active:
+                logger.info("⏹️ Closing WebSocket for ended session")
+                await close_websocket(websocket, WS_CLOSE_SESSION_ENDED, "Session ended")
+                return
+            
+            if not decoded:
+                continue
+            
+            session.frame_count += 1
+            
+            if landmarks is not None:
+                # Detect squat
+                squat_analysis = session.detector.detect_squat(landmarks)
+                
+                # Check for squat completion
+                voice_feedback = None
+                if session.detector.has_squat_just_completed():
+                    was_perfect = session.detector.was_last_squat_perfect()
+                    voice_feedback = session.detector.get_squat_completion_feedback(was_perfect)
+                
+                # Prepare response
+                response = PoseResponse(
+                    landmarks=landmarks.tolist(),
+                    squat_analysis=SquatAnalysisPayload(
+                        is_squat_position=squat_analysis.is_squat_position,
+                        knee_angle=round(squat_analysis.knee_angle, 1),
+                        hip_angle=round(squat_analysis.hip_angle, 1),
+                        back_angle=round(squat_analysis.back_angle, 1),
+                        hip_depth=round(squat_analysis.hip_depth, 2),
+                        form_feedback=squat_analysis.form_feedback,
+                        checkpoint_results=squat_analysis.checkpoint_results
+                    ),
+                    squat_count=session.detector.get_squat_count(),
+                    voice_feedback=voice_feedback,
+                    t_ms=time.monotonic_ns() // 1_000_000
+                )
+                
+                outbox.put_result(response, must_deliver=voice_feedback is not None)
+            else:
+                # No pose detected
+                outbox.put_result({
+                    "type": "no_pose",
+                    "message": "No pose detected"
+                })
+    except Exception as e:
+        logger.error(f"❌ Frame processing error: {e}", exc_info=True)
+        await close_websocket(websocket)
+
+
+async def send_batches(websocket: WebSocket, outbox: Outbox):
+    """
+    Writer task - waits for messages, takes everything pending,
+    and sends it all as a single JSON array
+    """
+    try:
+        while True:
+            batch = await outbox.drain()
+            await websocket.send_text(msgspec.json.encode(batch).decode())
+    except Exception as e:
+        logger.error(f"❌ WebSocket send error: {e}", exc_info=True)
+        await close_websocket(websocket)
+
+
+async def close_websocket(websocket: WebSocket, code: int = 1011, reason: str = ""):
+    """Close the socket from a pipeline task (internal-error code by default)"""
+    try:
+        await websocket.close(code=code, reason=reason)
+    except Exception:
+        pass  # Already closed/disconnected
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Release pose graphs and stop inference workers on shutdown"""
+    for session in sessions.values():
+        if session.is_active:
+            session.end_session()
+    # Queued graph closes still run; workers exit once the queue drains
+    inference_pool.shutdown(wait=False)
 
 
 @app.get("/")
@@ -145,9 +587,6 @@ async def end_session(session_id: str):
     
     logger.info(f"📊 Ended session {session_id}: {squat_count} squats, {duration}s")
     
-    # Clean up old sessions after 1 hour
-    # In production, use Redis or database
-    
     return summary
 
 
@@ -174,104 +613,86 @@ async def websocket_pose_endpoint(websocket: WebSocket, session_id: str):
     """
     WebSocket endpoint for real-time pose processing
     
-    Client sends: base64 encoded image frame
-    Server responds: pose landmarks + squat analysis
+    Client sends: binary messages - OP_FRAME + raw JPEG bytes, OP_RESET or OP_PING
+    Server responds: JSON arrays of messages (pose landmarks + squat analysis,
+                     control replies), batched when several are ready at once
     """
     await websocket.accept()
+    enable_tcp_nodelay(websocket)
     logger.info(f"🔌 WebSocket connected: {session_id}")
     
     # Get or create session
-    if session_id not in sessions:
-        sessions[session_id] = WorkoutSession()
+    session = sessions.get(session_id)
+    if session is None:
+        session = sessions[session_id] = WorkoutSession()
     
-    session = sessions[session_id]
+    session.connections += 1
+    if session.idle_timer is not None:
+        # Reconnected within the grace period
+        session.idle_timer.cancel()
+        session.idle_timer = None
+    
+    # Pipeline: this coroutine reads, a processor task runs inference and a
+    # writer task sends, so receive, inference and send overlap
+    frames = FrameSlot()
+    outbox = Outbox()
+    processor = asyncio.create_task(process_frames(websocket, session, frames, outbox))
+    writer = asyncio.create_task(send_batches(websocket, outbox))
     
     try:
         while True:
-            # Receive frame from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            # Every client message is binary: 1-byte opcode + payload
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
             
-            if message.get("type") == "frame":
-                # Decode base64 image
-                image_data = base64.b64decode(message["data"].split(",")[1])
-                nparr = np.frombuffer(image_data, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                
-                if frame is None:
-                    continue
-                
-                session.frame_count += 1
-                
-                # Convert BGR to RGB for MediaPipe
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Process with MediaPipe
-                results = pose.process(frame_rgb)
-                
-                if results.pose_landmarks:
-                    # Convert landmarks to dict format
-                    landmarks = []
-                    for landmark in results.pose_landmarks.landmark:
-                        landmarks.append({
-                            'x': landmark.x,
-                            'y': landmark.y,
-                            'z': landmark.z,
-                            'visibility': landmark.visibility
-                        })
-                    
-                    # Detect squat
-                    squat_analysis = session.detector.detect_squat(landmarks)
-                    
-                    # Check for squat completion
-                    voice_feedback = None
-                    if session.detector.has_squat_just_completed():
-                        was_perfect = session.detector.was_last_squat_perfect()
-                        voice_feedback = session.detector.get_squat_completion_feedback(was_perfect)
-                    
-                    # Prepare response
-                    response = {
-                        "type": "pose_results",
-                        "landmarks": landmarks,
-                        "squat_analysis": {
-                            "is_squat_position": squat_analysis.is_squat_position,
-                            "knee_angle": round(squat_analysis.knee_angle, 1),
-                            "hip_angle": round(squat_analysis.hip_angle, 1),
-                            "back_angle": round(squat_analysis.back_angle, 1),
-                            "hip_depth": round(squat_analysis.hip_depth, 2),
-                            "form_feedback": squat_analysis.form_feedback,
-                            "checkpoint_results": squat_analysis.checkpoint_results
-                        },
-                        "squat_count": session.detector.get_squat_count(),
-                        "voice_feedback": voice_feedback,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    
-                    await websocket.send_json(response)
-                else:
-                    # No pose detected
-                    await websocket.send_json({
-                        "type": "no_pose",
-                        "message": "No pose detected"
-                    })
+            # Any client message keeps the session alive; an ended
+            # session is never put back (the processor closes the socket)
+            if session.is_active:
+                sessions[session_id] = session
             
-            elif message.get("type") == "reset":
+            payload = message.get("bytes")
+            if not payload:
+                continue
+            op = payload[0]
+            
+            if op == OP_FRAME and len(payload) > 1:
+                # Raw JPEG bytes (skip the opcode, no copy); replaces any
+                # frame the processor hasn't picked up yet
+                frames.submit(np.frombuffer(payload, np.uint8, offset=1))
+            
+            elif op == OP_RESET:
                 # Reset squat counter
                 session.detector.reset_squat_count()
-                await websocket.send_json({
+                outbox.put_reply({
                     "type": "reset_complete",
                     "message": "Counter reset"
                 })
             
-            elif message.get("type") == "ping":
+            elif op == OP_PING:
                 # Heartbeat
-                await websocket.send_json({"type": "pong"})
+                outbox.put_reply({"type": "pong"})
                 
     except WebSocketDisconnect:
         logger.info(f"🔌 WebSocket disconnected: {session_id}")
     except Exception as e:
         logger.error(f"❌ WebSocket error: {e}", exc_info=True)
         await websocket.close()
+    finally:
+        processor.cancel()
+        writer.cancel()
+        # Retrieve task results so failures are never left unobserved
+        await asyncio.gather(processor, writer, return_exceptions=True)
+        frames.clear()
+        
+        session.connections -= 1
+        if session.is_active and session.connections == 0:
+            sessions[session_id] = session  # Restart the TTL from disconnect
+            if session.idle_timer is not None:
+                session.idle_timer.cancel()
+            session.idle_timer = asyncio.get_running_loop().call_later(
+                SESSION_GRACE_SECONDS, drop_idle_session, session_id, session
+            )
 
 
 @app.post("/api/process-image")
@@ -283,27 +704,25 @@ async def process_image(request: dict):
         # Decode base64 image
         image_data = base64.b64decode(request["image"].split(",")[1])
         nparr = np.frombuffer(image_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
-        # Convert BGR to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Decode and run pose inference off the event loop
+        decoded, landmarks = await asyncio.get_running_loop().run_in_executor(
+            inference_pool, process_image_frame, nparr
+        )
         
-        # Process with MediaPipe
-        results = pose.process(frame_rgb)
+        if not decoded:
+            return {
+                "success": False,
+                "message": "Invalid image"
+            }
         
-        if results.pose_landmarks:
-            landmarks = []
-            for landmark in results.pose_landmarks.landmark:
-                landmarks.append({
-                    'x': landmark.x,
-                    'y': landmark.y,
-                    'z': landmark.z,
-                    'visibility': landmark.visibility
-                })
-            
+        if landmarks is not None:
             return {
                 "success": True,
-                "landmarks": landmarks
+                "landmarks": [
+                    {'x': x, 'y': y, 'z': z, 'visibility': v}
+                    for x, y, z, v in landmarks.tolist()
+                ]
             }
         else:
             return {
@@ -327,5 +746,8 @@ if __name__ == "__main__":
         app,
         host="0.0.0.0",
         port=8080,
+        loop="auto",  # uvloop when installed (not available on Windows)
+        http="httptools",
+        ws="websockets",
         log_level="info"
     )
\ No newline at end of file
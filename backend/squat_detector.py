@@ -5,12 +5,72 @@ Detects and counts perfect squat form using pose landmarks
 """
 
 import math
-from typing import Dict, List, Tuple, Optional
+import random
+from typing import Dict, Tuple, Optional
 from dataclasses import dataclass
 import logging
 
+import numpy as np
+from numba import njit
+
 logger = logging.getLogger(__name__)
 
+_RAD2DEG = 57.29577951308232  # 180 / pi
+
+# Voice feedback templates for a perfect squat ({} = squat count)
+_PERFECT_SQUAT_PHRASES = (
+    "Great job! Perfect squat! {}",
+    "Nice form! Keep going! {}",
+    "Excellent squat, well done! {}",
+    "Perfect! That's {}",
+    "Amazing form! {} squats",
+)
+
+
+# Geometry kernels (compiled with Numba; points is a (33, 2) x/y array)
+
+@njit(cache=True, fastmath=True)
+def _calculate_angles(points: np.ndarray, triples: np.ndarray) -> np.ndarray:
+    """Calculate the angle at the mid point of each (first, mid, last) column of triples"""
+    angles = np.empty(triples.shape[1])
+    for j in range(triples.shape[1]):
+        first, mid, last = triples[0, j], triples[1, j], triples[2, j]
+        radians = math.atan2(points[last, 1] - points[mid, 1], points[last, 0] - points[mid, 0]) - \
+                  math.atan2(points[first, 1] - points[mid, 1], points[first, 0] - points[mid, 0])
+        angle = radians * _RAD2DEG
+        
+        if angle < 0:
+            angle += 360.0
+        if angle > 180:
+            angle = 360.0 - angle
+        
+        angles[j] = angle
+    return angles
+
+
+@njit(cache=True, fastmath=True)
+def _calculate_back_lean(points: np.ndarray, shoulders: np.ndarray, hips: np.ndarray) -> float:
+    """Calculate back lean angle from left/right shoulder and hip indices"""
+    shoulder_mid_x = (points[shoulders[0], 0] + points[shoulders[1], 0]) / 2
+    shoulder_mid_y = (points[shoulders[0], 1] + points[shoulders[1], 1]) / 2
+    hip_mid_x = (points[hips[0], 0] + points[hips[1], 0]) / 2
+    hip_mid_y = (points[hips[0], 1] + points[hips[1], 1]) / 2
+    
+    lean_angle = math.atan2(shoulder_mid_x - hip_mid_x, shoulder_mid_y - hip_mid_y) * _RAD2DEG
+    return abs(lean_angle)
+
+
+@njit(cache=True, fastmath=True)
+def _calculate_hip_depth(points: np.ndarray, hips: np.ndarray, knees: np.ndarray) -> float:
+    """Calculate hip depth ratio from left/right hip and knee indices"""
+    hip_y = (points[hips[0], 1] + points[hips[1], 1]) / 2
+    knee_y = (points[knees[0], 1] + points[knees[1], 1]) / 2
+    
+    if knee_y == 0:
+        return 0.0
+    
+    return hip_y / knee_y
+
 
 @dataclass
 class SquatAnalysis:
@@ -40,6 +100,18 @@ class SquatDetector:
     LEFT_ANKLE = 27
     RIGHT_ANKLE = 28
     
+    # Angle point triples as rows (first, mid, last);
+    # columns: left knee, right knee, left hip, right hip
+    ANGLE_TRIPLES = np.array([
+        [LEFT_HIP, RIGHT_HIP, LEFT_SHOULDER, RIGHT_SHOULDER],
+        [LEFT_KNEE, RIGHT_KNEE, LEFT_HIP, RIGHT_HIP],
+        [LEFT_ANKLE, RIGHT_ANKLE, LEFT_KNEE, RIGHT_KNEE],
+    ])
+    
+    SHOULDERS = np.array([LEFT_SHOULDER, RIGHT_SHOULDER])
+    HIPS = np.array([LEFT_HIP, RIGHT_HIP])
+    KNEES = np.array([LEFT_KNEE, RIGHT_KNEE])
+    
     # Detection thresholds
     STANDING_KNEE_THRESHOLD = 130.0  # Above this = standing
     SQUATTING_KNEE_THRESHOLD = 120.0  # Below this = squatting
@@ -90,74 +162,42 @@ class SquatDetector:
         
         logger.info("✅ SquatDetector initialized")
     
-    def detect_squat(self, landmarks: List[Dict]) -> SquatAnalysis:
+    def detect_squat(self, landmarks: np.ndarray) -> SquatAnalysis:
         """
         Main detection method - processes pose landmarks
         
         Args:
-            landmarks: List of pose landmarks with x, y, z, visibility
+            landmarks: Array of shape (33, 4) with x, y, z, visibility per landmark
             
         Returns:
             SquatAnalysis with current form assessment
         """
         self.frame_count += 1
         
-        if not landmarks or len(landmarks) < 33:
+        if landmarks is None or len(landmarks) < 33:
             return self._get_empty_analysis("No pose detected")
         
-        # Calculate angles
-        left_knee_angle = self._calculate_angle(
-            landmarks[self.LEFT_HIP],
-            landmarks[self.LEFT_KNEE],
-            landmarks[self.LEFT_ANKLE]
-        )
-        right_knee_angle = self._calculate_angle(
-            landmarks[self.RIGHT_HIP],
-            landmarks[self.RIGHT_KNEE],
-            landmarks[self.RIGHT_ANKLE]
-        )
-        avg_knee_angle = (left_knee_angle + right_knee_angle) / 2
+        points = landmarks[:, :2]
         
-        left_hip_angle = self._calculate_angle(
-            landmarks[self.LEFT_SHOULDER],
-            landmarks[self.LEFT_HIP],
-            landmarks[self.LEFT_KNEE]
-        )
-        right_hip_angle = self._calculate_angle(
-            landmarks[self.RIGHT_SHOULDER],
-            landmarks[self.RIGHT_HIP],
-            landmarks[self.RIGHT_KNEE]
-        )
-        avg_hip_angle = (left_hip_angle + right_hip_angle) / 2
+        # Calculate left/right knee and hip angles in one pass
+        angles = _calculate_angles(points, self.ANGLE_TRIPLES)
+        avg_knee_angle = float(angles[:2].mean())
+        avg_hip_angle = float(angles[2:].mean())
         
-        back_lean = self._calculate_back_lean(
-            landmarks[self.LEFT_SHOULDER],
-            landmarks[self.RIGHT_SHOULDER],
-            landmarks[self.LEFT_HIP],
-            landmarks[self.RIGHT_HIP]
-        )
+        back_lean = _calculate_back_lean(points, self.SHOULDERS, self.HIPS)
         
-        hip_depth = self._calculate_hip_depth(
-            landmarks[self.LEFT_HIP],
-            landmarks[self.RIGHT_HIP],
-            landmarks[self.LEFT_KNEE],
-            landmarks[self.RIGHT_KNEE]
-        )
+        hip_depth = _calculate_hip_depth(points, self.HIPS, self.KNEES)
         
-        # Log every 30 frames
-        if self.frame_count - self.last_log_frame >= 30:
+        # Log every 30 frames (only when debug logging is on)
+        if logger.isEnabledFor(logging.DEBUG) and self.frame_count - self.last_log_frame >= 30:
             logger.debug(
-                f"📊 Frame {self.frame_count} | "
-                f"Knee: {avg_knee_angle:.0f}° | "
-                f"Hip: {avg_hip_angle:.0f}° | "
-                f"Back: {back_lean:.0f}° | "
-                f"Depth: {hip_depth:.2f}"
+                "📊 Frame %d | Knee: %.0f° | Hip: %.0f° | Back: %.0f° | Depth: %.2f",
+                self.frame_count, avg_knee_angle, avg_hip_angle, back_lean, hip_depth
             )
             logger.debug(
-                f"   State: {'SQUATTING' if self.is_currently_squatting else 'STANDING'} | "
-                f"Total: {self.total_attempts} | "
-                f"Correct: {self.correct_squats} | "
-                f"Missed: {self.missed_squats}"
+                "   State: %s | Total: %d | Correct: %d | Missed: %d",
+                "SQUATTING" if self.is_currently_squatting else "STANDING",
+                self.total_attempts, self.correct_squats, self.missed_squats
             )
             self.last_log_frame = self.frame_count
         
@@ -173,13 +213,11 @@ class SquatDetector:
         
         # Track performance during squat
         if self.is_currently_squatting:
+            # Branchless: bools add as 0/1
             self.current_squat_total_frames += 1
-            if knees_good:
-                self.current_squat_knee_frames += 1
-            if hips_good and depth_good:
-                self.current_squat_hip_frames += 1
-            if back_good:
-                self.current_squat_back_frames += 1
+            self.current_squat_knee_frames += knees_good
+            self.current_squat_hip_frames += hips_good and depth_good
+            self.current_squat_back_frames += back_good
             
             if avg_knee_angle < self.lowest_knee_angle_this_squat:
                 self.lowest_knee_angle_this_squat = avg_knee_angle
@@ -204,7 +242,7 @@ class SquatDetector:
             self.current_squat_back_frames = 0
             
             logger.info("🔽 ========== SQUAT STARTED ==========")
-            logger.info(f"   Frame: {self.frame_count} | Knee: {avg_knee_angle:.0f}°")
+            logger.info("   Frame: %d | Knee: %.0f°", self.frame_count, avg_knee_angle)
             logger.info("=" * 40)
             
         elif not self.was_standing and is_standing and self.is_currently_squatting:
@@ -215,12 +253,15 @@ class SquatDetector:
             self.squat_just_completed = True
             
             logger.info("🔼 ========== SQUAT COMPLETED ==========")
-            logger.info(f"   Frame: {self.frame_count} | Lowest Knee: {self.lowest_knee_angle_this_squat:.0f}°")
+            logger.info("   Frame: %d | Lowest Knee: %.0f°", self.frame_count, self.lowest_knee_angle_this_squat)
             logger.info("   Checking criteria:")
-            logger.info(f"      Knee: {'✓' if knees_good else '✗'} {avg_knee_angle:.0f}° (need {self.KNEE_PERFECT_MIN:.0f}-{self.KNEE_PERFECT_MAX:.0f}°)")
-            logger.info(f"      Hip: {'✓' if hips_good else '✗'} {avg_hip_angle:.0f}° (need {self.HIP_PERFECT_MIN:.0f}-{self.HIP_PERFECT_MAX:.0f}°)")
-            logger.info(f"      Depth: {'✓' if depth_good else '✗'} {hip_depth:.2f} (need ≥{self.MIN_HIP_DEPTH_RATIO})")
-            logger.info(f"      Back: {'✓' if back_good else '✗'} {back_lean:.0f}° (tracked but NOT required)")
+            logger.info("      Knee: %s %.0f° (need %.0f-%.0f°)", "✓" if knees_good else "✗",
+                        avg_knee_angle, self.KNEE_PERFECT_MIN, self.KNEE_PERFECT_MAX)
+            logger.info("      Hip: %s %.0f° (need %.0f-%.0f°)", "✓" if hips_good else "✗",
+                        avg_hip_angle, self.HIP_PERFECT_MIN, self.HIP_PERFECT_MAX)
+            logger.info("      Depth: %s %.2f (need ≥%s)", "✓" if depth_good else "✗",
+                        hip_depth, self.MIN_HIP_DEPTH_RATIO)
+            logger.info("      Back: %s %.0f° (tracked but NOT required)", "✓" if back_good else "✗", back_lean)
             
             sufficient_depth = self.lowest_knee_angle_this_squat < 110.0
             
@@ -235,7 +276,7 @@ class SquatDetector:
                 self.hip_correct_frames += self.current_squat_hip_frames
                 self.back_correct_frames += self.current_squat_back_frames
                 
-                logger.info(f"✅ RESULT: PERFECT SQUAT #{self.squat_count}")
+                logger.info("✅ RESULT: PERFECT SQUAT #%d", self.squat_count)
                 logger.info("   ⭐ Lower body form was excellent!")
             else:
                 # ❌ IMPERFECT SQUAT
@@ -244,11 +285,12 @@ class SquatDetector:
                 
                 logger.info("❌ RESULT: IMPERFECT SQUAT (NOT COUNTED)")
                 if not sufficient_depth:
-                    logger.info(f"   ✗ Insufficient depth: {self.lowest_knee_angle_this_squat:.0f}° (need <110°)")
+                    logger.info("   ✗ Insufficient depth: %.0f° (need <110°)", self.lowest_knee_angle_this_squat)
                 if not self.best_form_this_squat:
                     logger.info("   ✗ Lower body form issues")
             
-            logger.info(f"   TOTALS: Attempts={self.total_attempts} | Correct={self.correct_squats} | Missed={self.missed_squats}")
+            logger.info("   TOTALS: Attempts=%d | Correct=%d | Missed=%d",
+                        self.total_attempts, self.correct_squats, self.missed_squats)
             logger.info("=" * 40)
             
         elif is_standing:
@@ -285,15 +327,7 @@ class SquatDetector:
     def get_squat_completion_feedback(self, was_perfect: bool) -> str:
         """Get voice feedback for completed squat"""
         if was_perfect:
-            phrases = [
-                f"Great job! Perfect squat! {self.squat_count}",
-                f"Nice form! Keep going! {self.squat_count}",
-                f"Excellent squat, well done! {self.squat_count}",
-                f"Perfect! That's {self.squat_count}",
-                f"Amazing form! {self.squat_count} squats"
-            ]
-            import random
-            return random.choice(phrases)
+            return random.choice(_PERFECT_SQUAT_PHRASES).format(self.squat_count)
         else:
             return self._determine_bad_squat_feedback()
     
@@ -385,44 +419,6 @@ class SquatDetector:
     
     # Helper methods
     
-    def _calculate_angle(self, first_point: Dict, mid_point: Dict, last_point: Dict) -> float:
-        """Calculate angle between three points"""
-        radians = math.atan2(last_point['y'] - mid_point['y'], last_point['x'] - mid_point['x']) - \
-                  math.atan2(first_point['y'] - mid_point['y'], first_point['x'] - mid_point['x'])
-        angle = math.degrees(radians)
-        
-        if angle < 0:
-            angle += 360
-        if angle > 180:
-            angle = 360 - angle
-        
-        return angle
-    
-    def _calculate_back_lean(self, left_shoulder: Dict, right_shoulder: Dict, 
-                            left_hip: Dict, right_hip: Dict) -> float:
-        """Calculate back lean angle"""
-        shoulder_mid_x = (left_shoulder['x'] + right_shoulder['x']) / 2
-        shoulder_mid_y = (left_shoulder['y'] + right_shoulder['y']) / 2
-        hip_mid_x = (left_hip['x'] + right_hip['x']) / 2
-        hip_mid_y = (left_hip['y'] + right_hip['y']) / 2
-        
-        delta_x = shoulder_mid_x - hip_mid_x
-        delta_y = shoulder_mid_y - hip_mid_y
-        
-        lean_angle = math.degrees(math.atan2(delta_x, delta_y))
-        return abs(lean_angle)
-    
-    def _calculate_hip_depth(self, left_hip: Dict, right_hip: Dict,
-                            left_knee: Dict, right_knee: Dict) -> float:
-        """Calculate hip depth ratio"""
-        hip_y = (left_hip['y'] + right_hip['y']) / 2
-        knee_y = (left_knee['y'] + right_knee['y']) / 2
-        
-        if knee_y == 0:
-            return 0.0
-        
-        return hip_y / knee_y
-    
     def _generate_checkpoints(self, shoulders_good: bool, hips_good: bool,
                              knees_good: bool, ankles_good: bool) -> Dict[int, bool]:
         """Generate checkpoint results for visualization"""
@@ -469,4 +465,15 @@ class SquatDetector:
             hip_depth=0.0,
             form_feedback=feedback,
             checkpoint_results={}
-        )
\ No newline at end of file
+        )
+
+
+def _warm_up_kernels():
+    """Compile the geometry kernels at import so the first frame doesn't pay JIT cost"""
+    points = np.zeros((33, 4), dtype=np.float32)[:, :2]  # Same layout as detect_squat input
+    _calculate_angles(points, SquatDetector.ANGLE_TRIPLES)
+    _calculate_back_lean(points, SquatDetector.SHOULDERS, SquatDetector.HIPS)
+    _calculate_hip_depth(points, SquatDetector.HIPS, SquatDetector.KNEES)
+
+
+_warm_up_kernels()
@@ -0,0 +1,129 @@
+# tflite_pose.py
+"""
+TFLite Pose Landmarker - runs a BlazePose landmark model directly
+Bypasses the mp.solutions.pose wrapper; supports float and int8-quantized models
+"""
+
+import logging
+from typing import Optional
+
+import cv2
+import numpy as np
+
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    try:
+        from tensorflow.lite import Interpreter
+    except ImportError:
+        Interpreter = None
+
+logger = logging.getLogger(__name__)
+
+
+class TFLitePose:
+    """
+    Single-stage pose landmarker on a full-body crop
+    Expects the user to roughly fill the frame (no pose detection/ROI stage)
+    """
+
+    NUM_LANDMARKS = 33
+    VALUES_PER_LANDMARK = 5  # x, y, z, visibility, presence
+
+    def __init__(self, model_path: str, num_threads: int = 1,
+                 min_presence: float = 0.5):
+        if Interpreter is None:
+            raise ImportError("tflite_runtime or tensorflow is required for TFLitePose")
+
+        self.interpreter = Interpreter(
+            model_path=model_path,
+            num_threads=num_threads  # Sessions already run in parallel on the pool
+        )
+        self.interpreter.allocate_tensors()
+        self.min_presence = min_presence
+
+        input_details = self.interpreter.get_input_details()[0]
+        self.input_index = input_details["index"]
+        self.input_dtype = input_details["dtype"]
+        self.input_quantization = input_details["quantization"]
+        _, self.input_height, self.input_width, _ = input_details["shape"]
+
+        # Landmarks tensor is (1, 195) = 39 x 5; pose flag tensor is (1, 1)
+        output_details = self.interpreter.get_output_details()
+        self.landmarks_output = next(d for d in output_details if d["shape"][-1] == 195)
+        self.presence_output = next(d for d in output_details if tuple(d["shape"]) == (1, 1))
+
+        # Reused across calls
+        self.input_buffer = np.zeros(input_details["shape"], dtype=self.input_dtype)
+
+        logger.info(f"✅ TFLitePose initialized: {model_path} ({self.input_dtype.__name__})")
+
+    def process(self, frame_bgr: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Run the landmark model on a BGR frame (as decoded by OpenCV)
+
+        Returns:
+            Array of shape (33, 4) with normalized x, y, z, visibility, or None if no pose
+        """
+        # Letterbox: resize keeping aspect ratio, then pad to the square model input
+        frame_height, frame_width = frame_bgr.shape[:2]
+        scale = min(self.input_width / frame_width, self.input_height / frame_height)
+        content_width = max(1, round(frame_width * scale))
+        content_height = max(1, round(frame_height * scale))
+        pad_left = (self.input_width - content_width) // 2
+        pad_top = (self.input_height - content_height) // 2
+        
+        resized = cv2.resize(frame_bgr, (content_width, content_height),
+                             interpolation=cv2.INTER_AREA)
+        padded = cv2.copyMakeBorder(
+            resized,
+            pad_top, self.input_height - content_height - pad_top,
+            pad_left, self.input_width - content_width - pad_left,
+            cv2.BORDER_CONSTANT, value=(0, 0, 0)
+        )
+        self._fill_input(padded)
+
+        self.interpreter.set_tensor(self.input_index, self.input_buffer)
+        self.interpreter.invoke()
+
+        presence = self._read_output(self.presence_output).reshape(-1)[0]
+        if presence < self.min_presence:
+            return None
+
+        raw = self._read_output(self.landmarks_output).reshape(-1, self.VALUES_PER_LANDMARK)
+        raw = raw[:self.NUM_LANDMARKS]
+
+        landmarks = np.empty((self.NUM_LANDMARKS, 4), dtype=np.float32)
+        # Map back through the padding to coordinates normalized to the original frame
+        landmarks[:, 0] = (raw[:, 0] - pad_left) / content_width
+        landmarks[:, 1] = (raw[:, 1] - pad_top) / content_height
+        landmarks[:, 2] = raw[:, 2] / content_width
+        landmarks[:, 3] = 1.0 / (1.0 + np.exp(-raw[:, 3]))  # Visibility logits
+        return landmarks
+
+    def close(self):
+        """Release the interpreter"""
+        self.interpreter = None
+
+    # Helper methods
+
+    def _fill_input(self, image: np.ndarray):
+        """Normalize/quantize a resized BGR image into the input buffer as RGB"""
+        image = image[..., ::-1]  # Channel-swap view, no copy
+        if self.input_dtype == np.float32:
+            np.multiply(image, 1.0 / 255.0, out=self.input_buffer[0], casting="unsafe")
+            return
+
+        scale, zero_point = self.input_quantization
+        info = np.iinfo(self.input_dtype)
+        quantized = np.round(image / 255.0 / scale + zero_point)
+        self.input_buffer[0] = np.clip(quantized, info.min, info.max)
+
+    def _read_output(self, details: dict) -> np.ndarray:
+        """Read an output tensor, dequantizing if needed"""
+        tensor = self.interpreter.get_tensor(details["index"])
+        if tensor.dtype == np.float32:
+            return tensor
+
+        scale, zero_point = details["quantization"]
+        return (tensor.astype(np.float32) - zero_point) * scale